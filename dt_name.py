@@ -3,23 +3,49 @@
 
 import sys
 import json
+import codecs
+from itertools import accumulate
 from pathlib import Path
 import argparse
+import mmap
+import os
 import struct
 
+try:
+    import orjson  # Optional: faster JSON export/import
+except ImportError:
+    orjson = None
+
 ENCODING = 'shift_jis'
 CHARACTERS_EXTENSION = '._dt'
 JSON_EXTENSION = '.json'
 RECORD_SIZE = 20
+RECORD_STRUCT = struct.Struct('<10H')  # Precompiled record layout: id, name_offset, 8 fields
 STRINGS_OFFSET = 0x2E4  # Default strings section start
 
+def dump_json(obj, json_path):
+    """Write indented UTF-8 JSON, using orjson when it is installed"""
+    if orjson is not None:
+        with open(json_path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, indent=2, ensure_ascii=False)
+
+def load_json(json_path):
+    """Read UTF-8 JSON, using orjson when it is installed"""
+    if orjson is not None:
+        with open(json_path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
 def read_character_record(data, offset):
     """Read a single character record (20 bytes)"""
     if offset + RECORD_SIZE > len(data):
         return None
 
-    record_data = data[offset:offset + RECORD_SIZE]
-    fields = struct.unpack('<10H', record_data)  # 10 fields of 2 bytes each
+    fields = RECORD_STRUCT.unpack_from(data, offset)  # 10 fields of 2 bytes each
 
     return {
         'id': fields[0],
@@ -50,51 +76,32 @@ def extract_string_at_offset(file_data, offset):
 
 def find_strings_section_start(file_data):
     """Find where strings section actually starts by looking for the lowest valid string offset"""
-    min_offset = len(file_data)
+    # Scan window: records starting at or below 0x1000 (arbitrary limit) that end before EOF
+    max_records = 0x1000 // RECORD_SIZE + 1
+    record_count = min(max_records, max(0, (len(file_data) - 1) // RECORD_SIZE))
 
-    # Read all records to find minimum name_offset
-    offset = 0
-    while offset < len(file_data) - RECORD_SIZE:
-        record = read_character_record(file_data, offset)
-        if record is None:
-            break
-
-        if record['name_offset'] > 0 and record['name_offset'] < min_offset:
-            min_offset = record['name_offset']
-
-        offset += RECORD_SIZE
-
-        # Stop if we've gone past reasonable record area
-        if offset > 0x1000:  # Arbitrary limit
-            break
+    # Only the name_offset field is needed, so unpack all records in one pass
+    name_offsets = [fields[1] for fields in RECORD_STRUCT.iter_unpack(file_data[:record_count * RECORD_SIZE])]
+    min_offset = min((o for o in name_offsets if o > 0), default=len(file_data))
 
     return min_offset if min_offset < len(file_data) else STRINGS_OFFSET
 
-def decompile_characters(dat_path, json_path, test_compilation=False):
-    """Decompile characters file"""
-    print(f"=== DECOMPILING {dat_path} ===")
-
-    with open(dat_path, 'rb') as f:
-        original_data = f.read()
-
-    print(f"File size: {len(original_data)} bytes")
-
+def build_characters_result(file_data):
+    """Build the JSON structure for a characters file from its raw data"""
     # Find actual strings section start
-    strings_start = find_strings_section_start(original_data)
-    print(f"Strings section starts at: 0x{strings_start:04X} ({strings_start})")
+    strings_start = find_strings_section_start(file_data)
 
     # Read all character records
-    records = []
     characters_data = []
     offset = 0
 
     while offset < strings_start:
-        record = read_character_record(original_data, offset)
+        record = read_character_record(file_data, offset)
         if record is None:
             break
 
         # Extract the character name
-        name = extract_string_at_offset(original_data, record['name_offset'])
+        name = extract_string_at_offset(file_data, record['name_offset'])
 
         character_entry = {
             'id': record['id'],
@@ -106,19 +113,11 @@ def decompile_characters(dat_path, json_path, test_compilation=False):
         }
 
         characters_data.append(character_entry)
-        records.append(record)
         offset += RECORD_SIZE
 
-    print(f"Found {len(characters_data)} character records")
-
-    # Count non-empty names
-    non_empty_names = [c for c in characters_data if c['name'].strip()]
-    print(f"Characters with names: {len(non_empty_names)}")
-
-    # Create JSON structure
-    result = {
+    return {
         "file_info": {
-            "original_size": len(original_data),
+            "original_size": len(file_data),
             "encoding": ENCODING,
             "record_size": RECORD_SIZE,
             "strings_section_start": strings_start
@@ -126,22 +125,47 @@ def decompile_characters(dat_path, json_path, test_compilation=False):
         "characters": characters_data
     }
 
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(result, f, indent=2, ensure_ascii=False)
+def decompile_characters(dat_path, json_path, test_compilation=False):
+    """Decompile characters file"""
+    print(f"=== DECOMPILING {dat_path} ===")
+
+    with open(dat_path, 'rb') as f:
+        # mmap can't map an empty file, so that case is handled as empty bytes
+        if os.fstat(f.fileno()).st_size:
+            original_data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            original_data = b''
+
+    try:
+        print(f"File size: {len(original_data)} bytes")
+
+        result = build_characters_result(original_data)
+        strings_start = result['file_info']['strings_section_start']
+        characters_data = result['characters']
+        print(f"Strings section starts at: 0x{strings_start:04X} ({strings_start})")
+        print(f"Found {len(characters_data)} character records")
+
+        # Count non-empty names
+        non_empty_names = [c for c in characters_data if c['name'].strip()]
+        print(f"Characters with names: {len(non_empty_names)}")
 
-    print(f"\n✅ Decompiled to {json_path}")
-    print(f"📝 Edit 'name' fields in 'characters' array for translation")
-    print(f"ℹ️  Additional fields are preserved automatically")
+        dump_json(result, json_path)
 
-    if test_compilation:
-        test_compilation_process(dat_path, json_path, original_data)
+        print(f"\n✅ Decompiled to {json_path}")
+        print(f"📝 Edit 'name' fields in 'characters' array for translation")
+        print(f"ℹ️  Additional fields are preserved automatically")
+
+        if test_compilation:
+            test_compilation_process(dat_path, json_path, original_data, result)
+    finally:
+        if isinstance(original_data, mmap.mmap):
+            original_data.close()
 
 def compile_characters(json_path, dat_path):
     """Compile JSON back to characters file"""
     print(f"=== COMPILING {json_path} ===")
 
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_json(json_path)
 
     characters = data['characters']
     print(f"Original size: {data['file_info']['original_size']} bytes")
@@ -150,57 +174,40 @@ def compile_characters(json_path, dat_path):
     # Calculate records section size
     records_size = len(characters) * RECORD_SIZE
 
-    # Start building the strings section
-    strings_data = bytearray()
-    name_offsets = []
+    # Encode all names (with null terminator) up front
+    encode = codecs.getencoder(data['file_info']['encoding'])
+    encoded_names = [encode(character['name'], 'replace')[0] + b'\x00' for character in characters]
 
-    # Build strings and collect their offsets
-    for character in characters:
-        name = character['name']
-        current_offset = records_size + len(strings_data)
-        name_offsets.append(current_offset)
-
-        # Encode string with null terminator
-        encoded_name = name.encode(data['file_info']['encoding'], errors='replace') + b'\x00'
-        strings_data.extend(encoded_name)
+    # Each name offset is the records size plus the lengths of all preceding names
+    name_offsets = list(accumulate([records_size] + [len(name) for name in encoded_names]))[:-1]
+    strings_data = b''.join(encoded_names)
 
     print(f"Records section: {records_size} bytes")
     print(f"Strings section: {len(strings_data)} bytes")
     print(f"Total size: {records_size + len(strings_data)} bytes")
 
-    # Build the complete file
-    result_data = bytearray()
+    # Build the records section in a single preallocated buffer
+    records_data = bytearray(records_size)
 
     # Write all character records with updated name offsets
     for i, character in enumerate(characters):
-        # Prepare record data
-        record_fields = [
-            character['id'],
-            name_offsets[i],  # Updated name offset
-        ]
-
-        # Add the 8 additional fields
-        fields = character.get('fields', [0] * 8)
-        while len(fields) < 8:
-            fields.append(0)
-        record_fields.extend(fields[:8])
-
-        # Pack record (10 fields of 2 bytes each)
-        record_data = struct.pack('<10H', *record_fields)
-        result_data.extend(record_data)
-
-    # Append strings section
-    result_data.extend(strings_data)
-
-    # Save file
+        # Pad/trim the 8 additional fields
+        fields = list(character.get('fields', [0] * 8))[:8]
+        fields += [0] * (8 - len(fields))
+
+        # Pack record (10 fields of 2 bytes each) in place
+        RECORD_STRUCT.pack_into(records_data, i * RECORD_SIZE, character['id'], name_offsets[i], *fields)
+
+    # Save file: records and strings sections are written back to back, without concatenating them first
     with open(dat_path, 'wb') as f:
-        f.write(result_data)
+        f.writelines((records_data, strings_data))
 
+    new_size = records_size + len(strings_data)
     print(f"\n✅ Compiled to {dat_path}")
-    print(f"New size: {len(result_data)} bytes")
-    print(f"Size difference: {len(result_data) - data['file_info']['original_size']:+d} bytes")
+    print(f"New size: {new_size} bytes")
+    print(f"Size difference: {new_size - data['file_info']['original_size']:+d} bytes")
 
-def test_compilation_process(dat_path, json_path, original_data):
+def test_compilation_process(dat_path, json_path, original_data, original_result):
     """Test compilation process"""
     print("\n=== COMPILATION TEST ===")
     test_dat_path = dat_path.parent / f"{dat_path.stem}_test{dat_path.suffix}"
@@ -215,21 +222,17 @@ def test_compilation_process(dat_path, json_path, original_data):
         if len(compiled_data) == len(original_data):
             print("✅ TEST PASSED: File size matches!")
 
-            # Test that we can re-decompile and get same data
-            test_json_path = dat_path.parent / f"{dat_path.stem}_test.json"
-            decompile_characters(test_dat_path, test_json_path, test_compilation=False)
-
-            with open(json_path, 'r', encoding='utf-8') as f:
-                original_json = json.load(f)
-            with open(test_json_path, 'r', encoding='utf-8') as f:
-                compiled_json = json.load(f)
+            # Test that we can re-decompile and get same data (compared in memory)
+            compiled_result = build_characters_result(compiled_data)
 
             # Compare characters data
-            if original_json['characters'] == compiled_json['characters']:
+            if original_result['characters'] == compiled_result['characters']:
                 print("✅ DEEP TEST PASSED: Character data matches!")
                 test_dat_path.unlink()
-                test_json_path.unlink()
             else:
+                test_json_path = dat_path.parent / f"{dat_path.stem}_test.json"
+                dump_json(compiled_result, test_json_path)
+
                 print("⚠️  Character data differs, but file structure is correct")
                 print(f"Test files saved: {test_dat_path}, {test_json_path}")
 
@@ -5,186 +5,216 @@ Converts ._dt files to JSON format for easier translation work
 Based on the structure of the @Ivdos program
 """
 
+import codecs
+import io
+import mmap
+import os
+import re
 import struct
 import json
 import sys
 import argparse
 from pathlib import Path
 
+try:
+    import orjson  # Optional: faster JSON export/import
+except ImportError:
+    orjson = None
+
+
+# Словарь замен для символов, несовместимых с SJIS
+INCOMPATIBLE_CHARS_REPLACEMENTS = {
+    '\u00AD': '',       # Soft Hyphen (SHY) -> удаляем
+    '\u2011': '-',      # - -> обычный дефис
+    '\u2014': '-',      # Em dash (—) -> обычный дефис
+    '\u2013': '-',      # En dash (–) -> обычный дефис
+    '\u2015': '-',      # Horizontal bar (―) -> обычный дефис
+    '\u2018': "'",      # Left single quote (') -> обычный апостроф
+    '\u2019': "'",      # Right single quote (') -> обычный апостроф
+    '\u201C': '"',      # Left double quote (") -> обычные кавычки
+    '\u201D': '"',      # Right double quote (") -> обычные кавычки
+    '\u2026': '...',    # Ellipsis (…) -> три точки
+    '\u2022': '*',      # Bullet (•) -> звездочка
+    '\u2032': "'",      # Prime (′) -> апостроф
+    '\u2033': '"',      # Double prime (″) -> кавычки
+    '\u00A0': ' ',      # Non-breaking space -> обычный пробел
+    '\u00AB': '"',      # Left-pointing double angle quotation mark («) -> кавычки
+    '\u00BB': '"',      # Right-pointing double angle quotation mark (») -> кавычки
+    '\u00A9': '(c)',    # Copyright symbol (©) -> (c)
+    '\u00AE': '(r)',    # Registered trademark (®) -> (r)
+    '\u2122': '(tm)',   # Trademark symbol (™) -> (tm)
+    '\u20AC': 'EUR',    # Euro symbol (€) -> EUR
+    '\u00A3': 'GBP',    # Pound symbol (£) -> GBP
+    '\u00A5': 'JPY',    # Yen symbol (¥) -> JPY
+    '\u2212': '-',      # Minus sign (−) -> обычный дефис
+    '\u0306': '',       # Combining breve (̆) -> удаляем
+    '\u0308': '',       # Combining diaeresis (̈) -> удаляем
+    '\u0301': '',       # Combining acute accent (́) -> удаляем
+    '\u0300': '',       # Combining grave accent (̀) -> удаляем
+    '\u0302': '',       # Combining circumflex accent (̂) -> удаляем
+    '\u0303': '',       # Combining tilde (̃) -> удаляем
+    '\u0304': '',       # Combining macron (̄) -> удаляем
+    '\u0307': '',       # Combining dot above (̇) -> удаляем
+    '\u030A': '',       # Combining ring above (̊) -> удаляем
+    '\u030B': '',       # Combining double acute accent (̋) -> удаляем
+    '\u030C': '',       # Combining caron (̌) -> удаляем
+    '\u0327': '',       # Combining cedilla (̧) -> удаляем
+    '\u0328': '',       # Combining ogonek (̨) -> удаляем
+    '\u0323': '',       # Combining dot below (̣) -> удаляем
+    '\u2116': '#',      # № -> #
+    '\u04af': 'у',      # ү -> у (это кириллическая у)
+    '\u200C': '',       # Zero Width Non-Joiner (ZWNJ) -> удаляем
+    '\u200D': '',       # Zero Width Joiner (ZWJ) -> удаляем
+    '\uFEFF': '',       # Zero Width No-Break Space (BOM) -> удаляем
+    '\u2215': '/',      # Division Slash (∕) -> обычный слэш
+    '\u2044': '/',      # Fraction Slash (⁄) -> обычный слэш
+    '\u00B7': '.',      # Middle Dot (·) -> точка
+    '\u02D9': '.',      # Dot Above (˙) -> точка
+    '\u201A': ',',      # Single Low-9 Quotation Mark (‚) -> запятая
+    '\u201E': '"',      # Double Low-9 Quotation Mark („) -> кавычки
+    '\u2039': '<',      # Single Left-Pointing Angle Quotation Mark (‹) -> <
+    '\u203A': '>',      # Single Right-Pointing Angle Quotation Mark (›) -> >
+    '\u00B0': '°',      # Degree Sign (°) -> градус
+    '\u00F7': '/',      # Division Sign (÷) -> слэш
+    '\u00D7': 'x',      # Multiplication Sign (×) -> латинская x
+    '\u03BC': 'μ',      # Micro Sign (µ) -> греческая μ
+}
+
+# Замены для расширенных символов (кириллица и латиница с диакритикой)
+EXTENDED_CHARS_REPLACEMENTS = {
+    # Проверка для кириллических символов с диакритическими знаками
+    '\u04AF': 'у',     # ү -> у
+
+    # Кириллические символы
+    '\u0401': 'Е',     # Ё -> Е
+    '\u0451': 'е',     # ё -> е
+
+    # Расширенные кириллические символы
+    '\u0406': 'И',     # І -> И
+    '\u0456': 'и',     # і -> и
+    '\u0407': 'И',     # Ї -> И
+    '\u0457': 'и',     # ї -> и
+    '\u0404': 'Э',     # Є -> Э
+    '\u0454': 'э',     # є -> э
+    '\u0490': 'Г',     # Ґ -> Г
+    '\u0491': 'г',     # ґ -> г
+
+    # Белорусские символы
+    '\u040E': 'У',     # Ў -> У
+    '\u045E': 'у',     # ў -> у
+
+    # Другие кириллические
+    '\u04D8': 'Е',     # Ә -> Е
+    '\u04D9': 'е',     # ә -> е
+    '\u04A2': 'Н',     # Ң -> Н
+    '\u04A3': 'н',     # ң -> н
+    '\u0492': 'Г',     # Ғ -> Г
+    '\u0493': 'г',     # ғ -> г
+    '\u04B0': 'У',     # Ұ -> У
+    '\u04B1': 'у',     # ұ -> у
+    '\u04AE': 'У',     # Ү -> У
+    '\u049A': 'К',     # Қ -> К
+    '\u049B': 'к',     # қ -> к
+    '\u04E8': 'О',     # Ө -> О
+    '\u04E9': 'о',     # ө -> о
+    '\u04BA': 'Х',     # Һ -> Х
+    '\u04BB': 'х',     # һ -> х
+
+    # Латинские символы с диакритикой
+    **dict.fromkeys('\u00C0\u00C1\u00C2\u00C3\u00C4\u00C5', 'A'),  # À-Å -> A
+    **dict.fromkeys('\u00E0\u00E1\u00E2\u00E3\u00E4\u00E5', 'a'),  # à-å -> a
+    '\u00C6': 'AE',    # Æ -> AE
+    '\u00E6': 'ae',    # æ -> ae
+    '\u00C7': 'C',     # Ç -> C
+    '\u00E7': 'c',     # ç -> c
+    **dict.fromkeys('\u00C8\u00C9\u00CA\u00CB', 'E'),  # È-Ë -> E
+    **dict.fromkeys('\u00E8\u00E9\u00EA\u00EB', 'e'),  # è-ë -> e
+    **dict.fromkeys('\u00CC\u00CD\u00CE\u00CF', 'I'),  # Ì-Ï -> I
+    **dict.fromkeys('\u00EC\u00ED\u00EE\u00EF', 'i'),  # ì-ï -> i
+    '\u00D0': 'D',     # Ð -> D
+    '\u00F0': 'd',     # ð -> d
+    '\u00D1': 'N',     # Ñ -> N
+    '\u00F1': 'n',     # ñ -> n
+    **dict.fromkeys('\u00D2\u00D3\u00D4\u00D5\u00D6\u00D8', 'O'),  # Ò-Ö, Ø -> O
+    **dict.fromkeys('\u00F2\u00F3\u00F4\u00F5\u00F6\u00F8', 'o'),  # ò-ö, ø -> o
+    **dict.fromkeys('\u00D9\u00DA\u00DB\u00DC', 'U'),  # Ù-Ü -> U
+    **dict.fromkeys('\u00F9\u00FA\u00FB\u00FC', 'u'),  # ù-ü -> u
+    '\u00DD': 'Y',     # Ý -> Y
+    '\u00FD': 'y',     # ý -> y
+    '\u00DE': 'Th',    # Þ -> Th
+    '\u00FE': 'th',    # þ -> th
+    '\u00DF': 'ss',    # ß -> ss
+}
+
+# Общая таблица замен в формате str.maketrans (ключи — коды символов), собранная один раз при импорте:
+# основной словарь имеет приоритет над расширенным
+SJIS_FIXUP_TABLE = str.maketrans({**EXTENDED_CHARS_REPLACEMENTS, **INCOMPATIBLE_CHARS_REPLACEMENTS})
+
+# Класс символов из всех заменяемых символов. Большинство строк (кириллица, ASCII) почти не
+# содержит таких символов, и поиск re пропускает их быстрее, чем str.translate
+SJIS_FIXUP_PATTERN = re.compile('[' + ''.join(re.escape(chr(code)) for code in SJIS_FIXUP_TABLE) + ']')
+
 
 class QuestDTDecompiler:
     ENTRY_COUNT = 80
     ENTRY_SIZE = 28  # 1(counter) + 11(reserved) + 4 + 4 + 4 + 4
+    # Precompiled binary layout (format string is parsed once, not per call)
+    HEADER_STRUCT = struct.Struct('<B11s4I')  # counter, reserved, name/client/description/progress pointers
     ENCODING = 'shift_jis'
     
-    # Словарь замен для символов, несовместимых с SJIS
-    INCOMPATIBLE_CHARS_REPLACEMENTS = {
-        '\u00AD': '',       # Soft Hyphen (SHY) -> удаляем
-        '\u2011': '-',      # - -> обычный дефис
-        '\u2014': '-',      # Em dash (—) -> обычный дефис
-        '\u2013': '-',      # En dash (–) -> обычный дефис
-        '\u2015': '-',      # Horizontal bar (―) -> обычный дефис
-        '\u2018': "'",      # Left single quote (') -> обычный апостроф
-        '\u2019': "'",      # Right single quote (') -> обычный апостроф
-        '\u201C': '"',      # Left double quote (") -> обычные кавычки
-        '\u201D': '"',      # Right double quote (") -> обычные кавычки
-        '\u2026': '...',    # Ellipsis (…) -> три точки
-        '\u2022': '*',      # Bullet (•) -> звездочка
-        '\u2032': "'",      # Prime (′) -> апостроф
-        '\u2033': '"',      # Double prime (″) -> кавычки
-        '\u00A0': ' ',      # Non-breaking space -> обычный пробел
-        '\u00AB': '"',      # Left-pointing double angle quotation mark («) -> кавычки
-        '\u00BB': '"',      # Right-pointing double angle quotation mark (») -> кавычки
-        '\u00A9': '(c)',    # Copyright symbol (©) -> (c)
-        '\u00AE': '(r)',    # Registered trademark (®) -> (r)
-        '\u2122': '(tm)',   # Trademark symbol (™) -> (tm)
-        '\u20AC': 'EUR',    # Euro symbol (€) -> EUR
-        '\u00A3': 'GBP',    # Pound symbol (£) -> GBP
-        '\u00A5': 'JPY',    # Yen symbol (¥) -> JPY
-        '\u2212': '-',      # Minus sign (−) -> обычный дефис
-        '\u0306': '',       # Combining breve (̆) -> удаляем
-        '\u0308': '',       # Combining diaeresis (̈) -> удаляем
-        '\u0301': '',       # Combining acute accent (́) -> удаляем
-        '\u0300': '',       # Combining grave accent (̀) -> удаляем
-        '\u0302': '',       # Combining circumflex accent (̂) -> удаляем
-        '\u0303': '',       # Combining tilde (̃) -> удаляем
-        '\u0304': '',       # Combining macron (̄) -> удаляем
-        '\u0307': '',       # Combining dot above (̇) -> удаляем
-        '\u030A': '',       # Combining ring above (̊) -> удаляем
-        '\u030B': '',       # Combining double acute accent (̋) -> удаляем
-        '\u030C': '',       # Combining caron (̌) -> удаляем
-        '\u0327': '',       # Combining cedilla (̧) -> удаляем
-        '\u0328': '',       # Combining ogonek (̨) -> удаляем
-        '\u0323': '',       # Combining dot below (̣) -> удаляем
-        '\u2116': '#',      # № -> #
-        '\u04af': 'у',      # ү -> у (это кириллическая у)
-        '\u200C': '',       # Zero Width Non-Joiner (ZWNJ) -> удаляем
-        '\u200D': '',       # Zero Width Joiner (ZWJ) -> удаляем
-        '\uFEFF': '',       # Zero Width No-Break Space (BOM) -> удаляем
-        '\u2215': '/',      # Division Slash (∕) -> обычный слэш
-        '\u2044': '/',      # Fraction Slash (⁄) -> обычный слэш
-        '\u00B7': '.',      # Middle Dot (·) -> точка
-        '\u02D9': '.',      # Dot Above (˙) -> точка
-        '\u201A': ',',      # Single Low-9 Quotation Mark (‚) -> запятая
-        '\u201E': '"',      # Double Low-9 Quotation Mark („) -> кавычки
-        '\u2039': '<',      # Single Left-Pointing Angle Quotation Mark (‹) -> <
-        '\u203A': '>',      # Single Right-Pointing Angle Quotation Mark (›) -> >
-        '\u00B0': '°',      # Degree Sign (°) -> градус
-        '\u00F7': '/',      # Division Sign (÷) -> слэш
-        '\u00D7': 'x',      # Multiplication Sign (×) -> латинская x
-        '\u03BC': 'μ',      # Micro Sign (µ) -> греческая μ
-    }
+    # Таблицы замен вынесены на уровень модуля; атрибуты оставлены для совместимости
+    INCOMPATIBLE_CHARS_REPLACEMENTS = INCOMPATIBLE_CHARS_REPLACEMENTS
+    EXTENDED_CHARS_REPLACEMENTS = EXTENDED_CHARS_REPLACEMENTS
 
     def __init__(self):
         self.entries = []
         self.file_size = 0
+        # Codec functions looked up once instead of on every encode/decode call
+        self.encoder = codecs.getencoder(self.ENCODING)
+        self.decoder = codecs.getdecoder(self.ENCODING)
+        # Memo of encode_quest_strings results, keyed by source text
+        self.encoded_strings = {}
+        # Strings decoded from the file being parsed, keyed by pointer (reset by parse_dt_data)
+        self.decoded_strings = {}
 
     def get_replacement_for_extended_char(self, c):
         """Получение замены для расширенных символов"""
-        char_code = ord(c)
-
-        # Проверка для кириллических символов с диакритическими знаками
-        if c == '\u04AF' or c == '\u04af':
-            return 'у'  # ү -> у
-
-        # Кириллические символы
-        if c == '\u0401': return 'Е'  # Ё -> Е
-        if c == '\u0451': return 'е'  # ё -> е
-
-        # Расширенные кириллические символы
-        if c == '\u0406': return 'И'  # І -> И
-        if c == '\u0456': return 'и'  # і -> и
-        if c == '\u0407': return 'И'  # Ї -> И
-        if c == '\u0457': return 'и'  # ї -> и
-        if c == '\u0404': return 'Э'  # Є -> Э
-        if c == '\u0454': return 'э'  # є -> э
-        if c == '\u0490': return 'Г'  # Ґ -> Г
-        if c == '\u0491': return 'г'  # ґ -> г
-
-        # Белорусские символы
-        if c == '\u040E': return 'У'  # Ў -> У
-        if c == '\u045E': return 'у'  # ў -> у
-
-        # Другие кириллические
-        if c == '\u04D8': return 'Е'  # Ә -> Е
-        if c == '\u04D9': return 'е'  # ә -> е
-        if c == '\u04A2': return 'Н'  # Ң -> Н
-        if c == '\u04A3': return 'н'  # ң -> н
-        if c == '\u0492': return 'Г'  # Ғ -> Г
-        if c == '\u0493': return 'г'  # ғ -> г
-        if c == '\u04B0': return 'У'  # Ұ -> У
-        if c == '\u04B1': return 'у'  # ұ -> у
-        if c == '\u04AE': return 'У'  # Ү -> У
-        if c == '\u049A': return 'К'  # Қ -> К
-        if c == '\u049B': return 'к'  # қ -> к
-        if c == '\u04E8': return 'О'  # Ө -> О
-        if c == '\u04E9': return 'о'  # ө -> о
-        if c == '\u04BA': return 'Х'  # Һ -> Х
-        if c == '\u04BB': return 'х'  # һ -> х
-
-        # Латинские символы с диакритикой
-        if 0x00C0 <= char_code <= 0x00C5: return 'A'  # À-Å -> A
-        if 0x00E0 <= char_code <= 0x00E5: return 'a'  # à-å -> a
-        if c == '\u00C6': return 'AE'  # Æ -> AE
-        if c == '\u00E6': return 'ae'  # æ -> ae
-        if c == '\u00C7': return 'C'   # Ç -> C
-        if c == '\u00E7': return 'c'   # ç -> c
-        if 0x00C8 <= char_code <= 0x00CB: return 'E'  # È-Ë -> E
-        if 0x00E8 <= char_code <= 0x00EB: return 'e'  # è-ë -> e
-        if 0x00CC <= char_code <= 0x00CF: return 'I'  # Ì-Ï -> I
-        if 0x00EC <= char_code <= 0x00EF: return 'i'  # ì-ï -> i
-        if c == '\u00D0': return 'D'   # Ð -> D
-        if c == '\u00F0': return 'd'   # ð -> d
-        if c == '\u00D1': return 'N'   # Ñ -> N
-        if c == '\u00F1': return 'n'   # ñ -> n
-        if (0x00D2 <= char_code <= 0x00D6) or c == '\u00D8': return 'O'  # Ò-Ö, Ø -> O
-        if (0x00F2 <= char_code <= 0x00F6) or c == '\u00F8': return 'o'  # ò-ö, ø -> o
-        if 0x00D9 <= char_code <= 0x00DC: return 'U'  # Ù-Ü -> U
-        if 0x00F9 <= char_code <= 0x00FC: return 'u'  # ù-ü -> u
-        if c == '\u00DD': return 'Y'   # Ý -> Y
-        if c == '\u00FD': return 'y'   # ý -> y
-        if c == '\u00DE': return 'Th'  # Þ -> Th
-        if c == '\u00FE': return 'th'  # þ -> th
-        if c == '\u00DF': return 'ss'  # ß -> ss
-
         # Если не нашли замену, возвращаем None
-        return None
+        return EXTENDED_CHARS_REPLACEMENTS.get(c)
 
     def replace_incompatible_chars(self, text):
         """Замена несовместимых с SJIS символов на поддерживаемые аналоги"""
         if not text:
             return text
 
-        result = []
-        for char in text:
-            # Сначала проверяем основной словарь
-            if char in self.INCOMPATIBLE_CHARS_REPLACEMENTS:
-                replacement = self.INCOMPATIBLE_CHARS_REPLACEMENTS[char]
-                result.append(replacement)
-            else:
-                # Затем проверяем расширенные символы
-                replacement = self.get_replacement_for_extended_char(char)
-                if replacement is not None:
-                    result.append(replacement)
-                else:
-                    result.append(char)
-
-        return ''.join(result)
+        return SJIS_FIXUP_PATTERN.sub(lambda match: SJIS_FIXUP_TABLE[ord(match.group())], text)
 
     def read_cstring_sjis(self, data, ptr):
         """Read null-terminated SJIS string at given pointer"""
-        if not ptr or ptr < 0 or ptr >= len(data):
+        # Headers often share pointers (e.g. one placeholder string), decode each only once.
+        # Only valid pointers are ever cached, so a hit needs no bounds check
+        cached = self.decoded_strings.get(ptr)
+        if cached is not None:
+            return cached
+
+        data_len = len(data)
+        if not ptr or ptr < 0 or ptr >= data_len:
             return ""
 
         # Find null terminator
-        end = ptr
-        while end < len(data) and data[end] != 0:
-            end += 1
+        end = data.find(b'\x00', ptr)
+        if end == -1:
+            end = data_len
 
         # Decode SJIS string
         try:
-            text = data[ptr:end].decode(self.ENCODING, errors='replace')
-            return text.replace('\u0001', '<LINE>')
+            raw = data[ptr:end]
+            text = self.decoder(raw, 'replace')[0]
+            # Most strings have no line breaks, so only build a new str when 0x01 is present
+            if b'\x01' in raw:
+                text = text.replace('\u0001', '<LINE>')
+            self.decoded_strings[ptr] = text
+            return text
         except Exception as e:
             print(f"Warning: SJIS decode error at 0x{ptr:X}: {e}")
             return ""
@@ -192,60 +222,56 @@ class QuestDTDecompiler:
     def parse_dt_file(self, file_path):
         """Parse ._dt file according to the structure"""
         with open(file_path, 'rb') as f:
-            data = f.read()
-
-        self.file_size = len(data)
-
-        if len(data) < self.ENTRY_COUNT * self.ENTRY_SIZE:
+            # mmap can't map an empty file; let parse_dt_data report it as too small
+            if not os.fstat(f.fileno()).st_size:
+                return self.parse_dt_data(b'')
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return self.parse_dt_data(data)
+
+    def parse_dt_data(self, data):
+        """Parse ._dt contents from a bytes-like buffer (bytes or mmap)"""
+        data_len = len(data)
+        self.file_size = data_len
+        self.decoded_strings = {}
+
+        if data_len < self.ENTRY_COUNT * self.ENTRY_SIZE:
             raise ValueError(f"File too small for header table. Need at least {self.ENTRY_COUNT * self.ENTRY_SIZE} bytes")
 
-        # Step 1: Read header entries
-        headers = []
-        for idx in range(self.ENTRY_COUNT):
-            offset = idx * self.ENTRY_SIZE
-
-            # Read header structure
-            counter = data[offset]
-            reserved = data[offset + 1:offset + 12]  # 11 bytes
-            name_ptr = struct.unpack('<I', data[offset + 12:offset + 16])[0]
-            client_ptr = struct.unpack('<I', data[offset + 16:offset + 20])[0]
-            description_ptr = struct.unpack('<I', data[offset + 20:offset + 24])[0]
-            progress_ptr = struct.unpack('<I', data[offset + 24:offset + 28])[0]
-
-            headers.append({
-                'idx': idx,
-                'counter': counter,
-                'reserved': list(reserved),
-                'name_ptr': name_ptr,
-                'client_ptr': client_ptr,
-                'description_ptr': description_ptr,
-                'progress_ptr': progress_ptr
-            })
+        # Step 1: Read header entries (the whole table is unpacked in one pass into per-field columns)
+        header_table = data[:self.ENTRY_COUNT * self.ENTRY_SIZE]
+        counters, reserved_fields, name_ptrs, client_ptrs, description_ptrs, progress_ptrs = \
+            zip(*self.HEADER_STRUCT.iter_unpack(header_table))
 
         # Step 2: Decode strings and create entries
         entries = []
-        for h in headers:
+        for idx in range(self.ENTRY_COUNT):
+            reserved_bytes = reserved_fields[idx]
+            name_ptr = name_ptrs[idx]
+            client_ptr = client_ptrs[idx]
+            description_ptr = description_ptrs[idx]
+            progress_ptr = progress_ptrs[idx]
+
             entry = {
-                'index': h['idx'],
-                'counter': h['counter'],
-                'reserved': h['reserved'],
-                'reserved_hex': ' '.join(f'{b:02x}' for b in h['reserved']),
-                'name': self.read_cstring_sjis(data, h['name_ptr']),
-                'client': self.read_cstring_sjis(data, h['client_ptr']),
-                'description': self.read_cstring_sjis(data, h['description_ptr']),
+                'index': idx,
+                'counter': counters[idx],
+                'reserved': list(reserved_bytes),
+                'reserved_hex': reserved_bytes.hex(' '),
+                'name': self.read_cstring_sjis(data, name_ptr),
+                'client': self.read_cstring_sjis(data, client_ptr),
+                'description': self.read_cstring_sjis(data, description_ptr),
                 'progress': [],
                 'pointers': {
-                    'name_ptr': f"0x{h['name_ptr']:08X}",
-                    'client_ptr': f"0x{h['client_ptr']:08X}",
-                    'description_ptr': f"0x{h['description_ptr']:08X}",
-                    'progress_ptr': f"0x{h['progress_ptr']:08X}"
+                    'name_ptr': f"0x{name_ptr:08X}",
+                    'client_ptr': f"0x{client_ptr:08X}",
+                    'description_ptr': f"0x{description_ptr:08X}",
+                    'progress_ptr': f"0x{progress_ptr:08X}"
                 }
             }
             entries.append(entry)
 
         # Step 3: Read progress arrays
         for i in range(self.ENTRY_COUNT):
-            this_ptr = headers[i]['progress_ptr']
+            this_ptr = progress_ptrs[i]
             if not this_ptr:
                 entries[i]['progress'] = []
                 continue
@@ -253,63 +279,102 @@ class QuestDTDecompiler:
             # Calculate size of progress array
             size_bytes = 0
             if i < self.ENTRY_COUNT - 1:
-                next_ptr = headers[i + 1]['progress_ptr']
-                if next_ptr > this_ptr and next_ptr <= len(data):
+                next_ptr = progress_ptrs[i + 1]
+                if next_ptr > this_ptr and next_ptr <= data_len:
                     size_bytes = next_ptr - this_ptr
                 else:
                     # Fallback: read until EOF
-                    size_bytes = len(data) - this_ptr if this_ptr < len(data) else 0
+                    size_bytes = data_len - this_ptr if this_ptr < data_len else 0
             else:
                 # Last entry: read until EOF
-                size_bytes = len(data) - this_ptr if this_ptr < len(data) else 0
+                size_bytes = data_len - this_ptr if this_ptr < data_len else 0
 
             # Read progress entries (each is a 4-byte pointer to string)
             count = max(0, size_bytes // 4)
-            progress_list = []
-
-            for j in range(count):
-                try:
-                    ptr_offset = this_ptr + j * 4
-                    if ptr_offset + 4 <= len(data):
-                        text_ptr = struct.unpack('<I', data[ptr_offset:ptr_offset + 4])[0]
-                        text = self.read_cstring_sjis(data, text_ptr)
-                        progress_list.append(text)
-                    else:
-                        break
-                except Exception as e:
-                    print(f"Warning: Error reading progress entry {j} for quest {i}: {e}")
-                    break
-
-            entries[i]['progress'] = progress_list
+
+            # Bounds are checked once for the whole array, then all pointers are unpacked in one call
+            if this_ptr + count * 4 > data_len:
+                count = max(0, (data_len - this_ptr) // 4)
+            # read_cstring_sjis bounds-checks and handles decode errors itself,
+            # so a single guard covers the whole array
+            try:
+                text_ptrs = struct.unpack_from(f'<{count}I', data, this_ptr) if count else ()
+                entries[i]['progress'] = [self.read_cstring_sjis(data, text_ptr) for text_ptr in text_ptrs]
+            except Exception as e:
+                print(f"Warning: Error reading progress array for quest {i}: {e}")
 
         self.entries = entries
         return entries
 
-    def to_json(self, output_path=None, indent=2):
-        """Export parsed data to JSON"""
-        output = {
-            'metadata': {
-                'format': 'Trails from Zero Quest DT',
-                'encoding': self.ENCODING,
-                'endianness': 'little',
-                'entry_count': self.ENTRY_COUNT,
-                'entry_size': self.ENTRY_SIZE,
-                'file_size': self.file_size
-            },
-            'quests': self.entries
+    def to_json(self, output_path=None, indent=2, file=None):
+        """Export parsed data to JSON (to file, or stdout, when no output path is given)"""
+        metadata = {
+            'format': 'Trails from Zero Quest DT',
+            'encoding': self.ENCODING,
+            'endianness': 'little',
+            'entry_count': self.ENTRY_COUNT,
+            'entry_size': self.ENTRY_SIZE,
+            'file_size': self.file_size
         }
 
+        # orjson only supports 2-space indentation; other widths go through the stdlib
+        use_orjson = orjson is not None and indent == 2
+
         if output_path:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(output, f, ensure_ascii=False, indent=indent)
+            with open(output_path, 'wb') as f:
+                self.write_json(f, metadata, indent, use_orjson)
             print(f"JSON exported to: {output_path}")
+        elif file is not None:
+            self.write_json(file, metadata, indent, use_orjson)
         else:
-            return json.dumps(output, ensure_ascii=False, indent=indent)
+            # No path: stream to stdout instead of building the whole document as one string
+            self.write_json(sys.stdout, metadata, indent, use_orjson)
+            sys.stdout.write('\n')
+            sys.stdout.flush()
+
+    def write_json(self, f, metadata, indent=2, use_orjson=False):
+        """Stream the JSON document into file f (binary or text) one quest at a time"""
+        if isinstance(f, io.TextIOBase):
+            # Text streams (stdout, StringIO, IDLE/Jupyter consoles) get str; every chunk
+            # is whole UTF-8, so it decodes on its own
+            def write(chunk):
+                f.write(chunk.decode('utf-8'))
+        else:
+            write = f.write
+
+        def dumps(obj):
+            if use_orjson:
+                return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+            return json.dumps(obj, ensure_ascii=False, indent=indent).encode('utf-8')
+
+        if indent is None:
+            write(dumps({'metadata': metadata, 'quests': self.entries}))
+            return
+
+        # Each value is dumped on its own and re-indented to its nesting level, which
+        # gives the same bytes as dumping the whole document (JSON strings never hold a raw newline)
+        pad = b' ' * indent
+        write(b'{\n' + pad + b'"metadata": ' + dumps(metadata).replace(b'\n', b'\n' + pad) + b',\n')
+
+        if not self.entries:
+            write(pad + b'"quests": []\n}')
+            return
+
+        write(pad + b'"quests": [')
+        separator = b'\n'
+        for entry in self.entries:
+            write(separator + pad * 2 + dumps(entry).replace(b'\n', b'\n' + pad * 2))
+            separator = b',\n'
+        write(b'\n' + pad + b']\n}')
 
     def from_json(self, json_path):
         """Load data from JSON for recompilation"""
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if orjson is not None:
+            with open(json_path, 'rb') as f:
+                data = orjson.loads(f.read())
+        else:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
 
         self.entries = data['quests']
         return self.entries
@@ -320,26 +385,61 @@ class QuestDTDecompiler:
             return b'\x00'
 
         try:
-            # Замена <LINE> обратно на управляющий символ
-            text = text.replace('<LINE>', '\u0001')
+            return self.encode_sjis_strings([text])[0]
+        except Exception as e:
+            print(f"Warning: SJIS encode error for '{text}': {e}")
+            return b'\x00'
 
+    def encode_quest_strings(self, texts):
+        """Encode one quest's strings with null terminators, batching those not encoded before"""
+        # Repeated strings (boilerplate, shared names) skip the whole replace/encode/check pipeline
+        memo = self.encoded_strings
+        pending = list(dict.fromkeys(
+            text for text in texts if isinstance(text, str) and text not in memo
+        ))
+        if pending:
+            memo.update(zip(pending, self.encode_sjis_strings(pending)))
+
+        # Non-string values in the JSON can't be joined: they are encoded one by one, so only
+        # those become empty strings (with a warning) instead of failing the compile
+        return [memo[text] if isinstance(text, str) else self.encode_sjis_with_null(text)
+                for text in texts]
+
+    def encode_sjis_strings(self, texts):
+        """Encode several strings to SJIS with null terminators in one replace/translate/encode pass"""
+        # Strings are joined on NUL: it never occurs inside an SJIS multibyte character,
+        # so the encoded result splits back into the individual strings
+        joined = '\x00'.join(texts)
+
+        # Замена <LINE> обратно на управляющий символ
+        if '<LINE>' in joined:
+            joined = joined.replace('<LINE>', '\u0001')
+
+        if joined.isascii():
+            # ASCII fast path: no replaceable characters, and ASCII encodes to itself in SJIS
+            encoded = joined.encode('ascii')
+        else:
             # ВАЖНО: Замена несовместимых символов перед кодированием в SJIS
-            text = self.replace_incompatible_chars(text)
+            joined = self.replace_incompatible_chars(joined)
 
             # Кодирование в SJIS
-            encoded = text.encode(self.ENCODING, errors='replace')
+            encoded = self.encoder(joined, 'replace')[0]
 
-            # Проверка на наличие знаков вопроса (могут появиться при неудачной замене)
-            decoded_check = encoded.decode(self.ENCODING, errors='replace')
-            if '?' in decoded_check and '?' not in text:
-                print(f"Warning: Some characters may not encode properly to SJIS: '{text}'")
-                print(f"Encoded result: '{decoded_check}'")
+        parts = encoded.split(b'\x00') if len(texts) > 1 else [encoded]
+        if len(parts) != len(texts):
+            # A text contains NUL itself, so the batch can't be split: encode one by one
+            return [self.encode_sjis_strings([text])[0] for text in texts]
 
-            return encoded + b'\x00'
+        # Проверка на наличие знаков вопроса (могут появиться при неудачной замене).
+        # 0x3F никогда не бывает вторым байтом SJIS, поэтому проверяем байты без повторного декодирования
+        if b'?' in encoded:
+            prepared = joined.split('\x00') if len(texts) > 1 else [joined]
+            for text, part in zip(prepared, parts):
+                if b'?' in part and '?' not in text:
+                    print(f"Warning: Some characters may not encode properly to SJIS: '{text}'")
+                    print(f"Encoded result: '{self.decoder(part, 'replace')[0]}'")
 
-        except Exception as e:
-            print(f"Warning: SJIS encode error for '{text}': {e}")
-            return b'\x00'
+        return [part + b'\x00' for part in parts]
 
     def compile_to_dt(self, output_path):
         """Compile JSON data back to ._dt format"""
@@ -348,63 +448,77 @@ class QuestDTDecompiler:
 
         # Calculate header size
         header_size = self.ENTRY_COUNT * self.ENTRY_SIZE
-        header = bytearray(header_size)
-
-        # Body parts and cursor for allocation
-        body_parts = []
-        cursor = header_size
 
-        def allocate(data):
-            nonlocal cursor
-            start = cursor
-            body_parts.append(data)
-            cursor += len(data)
-            return start
+        # The whole file is built in one buffer: the header is zero-filled now and
+        # packed in place at the end, the body is appended behind it
+        final_data = bytearray(header_size)
+
+        # Identical encoded strings (empty ones especially) are stored once and shared by pointer
+        string_ptrs = {}
+
+        def allocate_string(data):
+            ptr = string_ptrs.get(data)
+            if ptr is None:
+                ptr = string_ptrs[data] = len(final_data)
+                final_data.extend(data)
+            return ptr
+
+        # Unused quest slots are mostly empty strings: all of them share one terminator
+        # allocated up front
+        allocate_string(b'\x00')
+
+        # Each quest's strings (name, client, description, progress) are encoded in one batch
+        encoded_entries = [
+            self.encode_quest_strings([
+                entry.get('name') or '',
+                entry.get('client') or '',
+                entry.get('description') or '',
+                *(text or '' for text in entry.get('progress', []))
+            ])
+            for entry in self.entries
+        ]
+
+        # Pointers per entry position, kept apart from the loaded entries so they stay untouched
+        name_ptrs = []
+        client_ptrs = []
+        desc_ptrs = []
+        progress_array_ptrs = []
 
         # Allocate strings first
-        for entry in self.entries:
-            entry['_name_ptr'] = allocate(self.encode_sjis_with_null(entry.get('name', '')))
-            entry['_client_ptr'] = allocate(self.encode_sjis_with_null(entry.get('client', '')))
-            entry['_desc_ptr'] = allocate(self.encode_sjis_with_null(entry.get('description', '')))
+        for encoded in encoded_entries:
+            name_ptrs.append(allocate_string(encoded[0]))
+            client_ptrs.append(allocate_string(encoded[1]))
+            desc_ptrs.append(allocate_string(encoded[2]))
 
         # Allocate progress strings and arrays
-        for entry in self.entries:
-            progress = entry.get('progress', [])
-            if not progress:
-                entry['_progress_ptr'] = 0
+        for encoded in encoded_entries:
+            encoded_progress = encoded[3:]
+            if not encoded_progress:
+                progress_array_ptrs.append(0)
                 continue
 
             # Allocate progress text strings
-            progress_ptrs = []
-            for text in progress:
-                ptr = allocate(self.encode_sjis_with_null(text))
-                progress_ptrs.append(ptr)
-
-            # Allocate progress pointer array
-            progress_array = b''.join(struct.pack('<I', ptr) for ptr in progress_ptrs)
-            entry['_progress_ptr'] = allocate(progress_array)
-
-        # Write header
-        for entry in self.entries:
-            offset = entry['index'] * self.ENTRY_SIZE
-
-            # Counter (1 byte)
-            header[offset] = entry.get('counter', 0) & 0xFF
-
-            # Reserved (11 bytes)
-            reserved = entry.get('reserved', [0] * 11)
-            for i in range(11):
-                header[offset + 1 + i] = reserved[i] if i < len(reserved) else 0
-
-            # Pointers (4 bytes each, little endian)
-            struct.pack_into('<I', header, offset + 12, entry['_name_ptr'])
-            struct.pack_into('<I', header, offset + 16, entry['_client_ptr'])
-            struct.pack_into('<I', header, offset + 20, entry['_desc_ptr'])
-            struct.pack_into('<I', header, offset + 24, entry['_progress_ptr'])
-
-        # Combine header and body
-        body = b''.join(body_parts)
-        final_data = bytes(header) + body
+            progress_ptrs = [allocate_string(data) for data in encoded_progress]
+
+            # Append progress pointer array (never shared, so no lookup needed)
+            progress_array_ptrs.append(len(final_data))
+            final_data.extend(struct.pack(f'<{len(progress_ptrs)}I', *progress_ptrs))
+
+        # Write header: counter (1 byte), reserved (11 bytes, zero-padded by '11s'),
+        # then the four little-endian pointers, packed in one call per entry
+        for i, entry in enumerate(self.entries):
+            # The header shares the buffer with the body, so an out-of-range index
+            # would silently overwrite string data instead of failing
+            index = entry['index']
+            if not 0 <= index < self.ENTRY_COUNT:
+                raise ValueError(f"Quest index {index} out of range (0-{self.ENTRY_COUNT - 1})")
+
+            reserved = bytes(entry.get('reserved', [0] * 11)[:11])
+            self.HEADER_STRUCT.pack_into(
+                final_data, index * self.ENTRY_SIZE,
+                entry.get('counter', 0) & 0xFF, reserved,
+                name_ptrs[i], client_ptrs[i], desc_ptrs[i], progress_array_ptrs[i]
+            )
 
         # Write to file
         with open(output_path, 'wb') as f: